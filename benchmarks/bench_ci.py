@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Compares case-insensitive search with help of ``CiSet`` and ``CiKeyDict``
+with linear scan of a list by ``CiStr``.
+
+Usage:
+
+    python benchmarks/bench_ci.py [size]
+"""
+
+import sys
+import timeit
+
+from cykooz.testing import CiKeyDict, CiSet, CiStr
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    names = ['X-Header-Name-%d' % i for i in range(size)]
+    headers = {name: str(i) for i, name in enumerate(names)}
+    needle = 'x-header-name-%d' % (size - 1)
+
+    ci_set = CiSet(names)
+    ci_dict = CiKeyDict(headers)
+    ci_needle = CiStr(needle)
+    assert ci_needle in names
+    assert needle in ci_set
+    assert ci_dict[needle] == str(size - 1)
+
+    cases = [
+        ('CiStr in list', lambda: ci_needle in names),
+        ('str in CiSet', lambda: needle in ci_set),
+        ('CiStr in CiSet', lambda: ci_needle in ci_set),
+        ('CiKeyDict[str]', lambda: ci_dict[needle]),
+    ]
+    print('%d items' % size)
+    for title, func in cases:
+        number, _ = timeit.Timer(func).autorange()
+        best = min(timeit.repeat(func, number=number, repeat=5)) / number
+        print('%-16s %12.3f us' % (title, best * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Measures comparison of ``RoundFloat`` with large sets of numbers
+of different types and compares it with rounding of every number
+by ``round()``.
+
+Usage:
+
+    python benchmarks/bench_roundfloat.py [size]
+"""
+
+import random
+import sys
+import time
+from decimal import Decimal
+from fractions import Fraction
+
+from cykooz.testing import RoundFloat
+
+
+def bench(title, func, values):
+    start = time.perf_counter()
+    matched = func(values)
+    elapsed = time.perf_counter() - start
+    print(
+        '%-28s %8.1f ns/value, %d matched'
+        % (title, elapsed / len(values) * 1e9, matched)
+    )
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rnd = random.Random(0)
+    floats = [rnd.uniform(1.2, 1.3) for _ in range(size)]
+    ints = [rnd.randrange(-1000, 1000) for _ in range(size)]
+    decimals = [Decimal(repr(v)) for v in floats[: size // 10]]
+    fractions = [Fraction(v) for v in floats[: size // 10]]
+
+    expected = RoundFloat(1.23456789, 3)
+    value, ndigits = expected.value, expected.ndigits
+
+    print('%d floats and ints, %d decimals and fractions' % (size, len(decimals)))
+    bench(
+        'round() == value, float',
+        lambda vs: sum(round(v, ndigits) == value for v in vs),
+        floats,
+    )
+    bench('RoundFloat == float', lambda vs: sum(expected == v for v in vs), floats)
+    bench(
+        'round() == value, int',
+        lambda vs: sum(round(v, ndigits) == value for v in vs),
+        ints,
+    )
+    bench('RoundFloat == int', lambda vs: sum(expected == v for v in vs), ints)
+    bench('RoundFloat == Decimal', lambda vs: sum(expected == v for v in vs), decimals)
+    bench(
+        'RoundFloat == Fraction', lambda vs: sum(expected == v for v in vs), fractions
+    )
+    bench('list.count(RoundFloat)', lambda vs: vs.count(expected), floats)
+
+    try:
+        import numpy
+    except ImportError:
+        return
+    array = numpy.array(floats, dtype=numpy.float32)
+    scalars = list(array[: size // 10])
+    bench(
+        'RoundFloat == numpy.float32',
+        lambda vs: sum(expected == v for v in vs),
+        scalars,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Scaling benchmark of matchers used from many threads.
+
+Every thread compares the same shared matchers with the same shared values.
+A fresh ``MatcherIndex`` is shared by all threads of each run, so its
+buckets are built concurrently. Correctness of these comparisons
+is checked by ``cykooz/testing/tests/test_threads.py``.
+
+On the free-threaded build of CPython (3.13t and newer) throughput
+must grow with the number of threads. On the regular build it stays
+nearly constant because of GIL.
+
+Usage:
+
+    python benchmarks/bench_threads.py [iterations] [max_threads]
+"""
+
+import sys
+import threading
+import time
+
+from cykooz.testing import MatcherIndex
+from cykooz.testing.tests.test_threads import INDEX_VALUES, compare
+
+
+def worker(iterations, index):
+    for i in range(iterations):
+        compare(i, index)
+
+
+def run(num_threads, iterations):
+    index = MatcherIndex(INDEX_VALUES)
+    threads = [
+        threading.Thread(target=worker, args=(iterations, index))
+        for _ in range(num_threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return num_threads * iterations / elapsed
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    max_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('GIL is %s' % ('enabled' if is_gil_enabled else 'disabled'))
+    base = None
+    num_threads = 1
+    while num_threads <= max_threads:
+        throughput = run(num_threads, iterations)
+        base = base or throughput
+        print(
+            '%2d threads: %10.0f comparisons/s (x%.2f)'
+            % (num_threads, throughput, throughput / base)
+        )
+        num_threads *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -4,16 +4,47 @@
 :Date: 19.11.2015
 """
 
+import codecs
+import inspect
 import json
+import math
+import os
 import re
+import threading
+from collections.abc import (
+    AsyncIterable,
+    Iterable,
+    Mapping,
+    MutableMapping,
+    MutableSet,
+    Set,
+)
+from decimal import (
+    MAX_EMAX,
+    MAX_PREC,
+    MIN_EMIN,
+    ROUND_HALF_EVEN,
+    Context,
+    Decimal,
+    localcontext,
+)
+from fractions import Fraction
+from functools import partial
+from itertools import chain
+from numbers import Integral, Real
+from operator import attrgetter
 
 
 __all__ = (
     'Url',
+    'UrlTemplate',
+    'UrlTemplateSet',
     'Dict',
     'D',
     'DictCi',
     'DCI',
+    'Attrs',
+    'A',
     'List',
     'L',
     'AnyValue',
@@ -22,14 +53,34 @@ __all__ = (
     'R',
     'Json',
     'J',
+    'JsonLines',
+    'JL',
     'CiStr',
     'CI',
+    'CiSet',
+    'CiKeyDict',
     'RoundFloat',
     'RF',
+    'MatcherIndex',
+    'Faster',
+    'MemoryBudget',
+    'Allocations',
+    'ComparisonMemo',
 )
 
 from urllib.parse import urlparse, parse_qsl, unquote_plus
 
+from cykooz.testing.mappings import BatchMapping
+from cykooz.testing.memo import ComparisonMemo
+from cykooz.testing.memory import Allocations, MemoryBudget
+from cykooz.testing.timing import Faster
+
+
+# Marker of values that can't be placed into buckets of MatcherIndex
+_NO_KEY = object()
+# Marker of keys that are absent in a mapping
+_MISSING = object()
+
 
 class Url:
     """A url object that can be compared with other url objects
@@ -68,6 +119,258 @@ class Url:
     def __hash__(self):
         return hash(self.parts)
 
+    def _index_keys(self):
+        return 'url', _url_key, (self.parts,)
+
+
+def _url_key(value):
+    parts = _url_parts(value)
+    return _NO_KEY if parts is None else parts
+
+
+class UrlTemplate:
+    """A url template that can be compared with urls. Path segments
+    of the template in form ``{name}`` match any non-empty path segment.
+    Template without scheme and host matches urls with any scheme and host.
+
+    Query parameters are compared as in ``Url`` - the url must contain
+    the same set of parameters. Parameter with value ``*`` matches
+    any value. Argument ``query`` allows to use matchers (e.g. ``ANY``
+    or ``RegExpString``) as values of query parameters.
+
+        >>> t = UrlTemplate('/users/{id}/orders?limit=*', query={'offset': R(r'\\d+$')})
+        >>> t == 'https://domain.com/users/42/orders?offset=0&limit=6'
+        True
+        >>> 'https://domain.com/users/42/orders?limit=6&offset=0' == t
+        True
+        >>> t == 'https://domain.com/users/42/orders?limit=6'
+        False
+        >>> t == 'https://domain.com/users/42/orders?offset=0&limit=6&x=1'
+        False
+        >>> t == 'https://domain.com/users/42/orders?offset=first&limit=6'
+        False
+        >>> t == 'https://domain.com/users/orders?offset=0&limit=6'
+        False
+        >>> t.match(Url('https://domain.com/users/42/orders?offset=0&limit=6'))
+        {'id': '42'}
+        >>> t
+        <UrlTemplate: /users/{id}/orders?limit=*>
+        >>> UrlTemplate('https://domain.com/users/{id}') == 'http://domain.com/users/1'
+        False
+    """
+
+    __slots__ = ('template', 'scheme', 'netloc', 'segments', 'query', 'query_matchers')
+
+    def __init__(self, template: str, query: Mapping | None = None):
+        self.template = template
+        parts = urlparse(template)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.segments = tuple(
+            _UrlParam(segment[1:-1])
+            if segment.startswith('{') and segment.endswith('}')
+            else segment
+            for segment in unquote_plus(parts.path).split('/')
+        )
+        query_items = list(parse_qsl(parts.query))
+        if query:
+            query_items.extend(query.items())
+        self.query = frozenset(
+            (k, v) for k, v in query_items if isinstance(v, str) and v != '*'
+        )
+        self.query_matchers = tuple(
+            (k, ANY if v == '*' else v)
+            for k, v in query_items
+            if not isinstance(v, str) or v == '*'
+        )
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        return self.match(other) is not None
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '<UrlTemplate: %s>' % self.template
+
+    def match(self, url) -> dict | None:
+        """Returns values of path parameters if given url is matched
+        to the template, otherwise - ``None``."""
+        parts = _url_parts(url)
+        if parts is None:
+            return None
+        if self.netloc and (parts.scheme, parts.netloc) != (self.scheme, self.netloc):
+            return None
+        segments = parts.path.split('/')
+        if len(segments) != len(self.segments):
+            return None
+        params = {}
+        for expected, segment in zip(self.segments, segments):
+            if isinstance(expected, _UrlParam):
+                if not segment:
+                    return None
+                params[expected.name] = segment
+            elif expected != segment:
+                return None
+        if not self._match_query(parts.query):
+            return None
+        return params
+
+    def _match_query(self, query: frozenset) -> bool:
+        if not self.query_matchers:
+            return self.query == query
+        if not self.query <= query:
+            return False
+        matchers = self.query_matchers
+        for key, value in query - self.query:
+            if not any(k == key and m == value for k, m in matchers):
+                return False
+        keys = {key for key, _ in query}
+        return all(k in keys for k, _ in matchers)
+
+
+class UrlTemplateSet:
+    """A set of url templates compiled into a trie keyed by scheme,
+    host and path segments. Search of a template matched to a url usually
+    costs time proportional to the number of path segments of the url,
+    not to the number of templates. Branches of the trie that lead only
+    to templates with other number of segments are skipped. In the worst
+    case, when both literal and parameter segments match a prefix
+    of the url but not the rest of it, the search goes back and visits
+    all templates with matching prefixes.
+
+        >>> templates = UrlTemplateSet([
+        ...     '/users/{id}',
+        ...     '/users/me',
+        ...     '/users/{id}/orders?limit=*',
+        ...     'https://cdn.com/{path}',
+        ... ])
+        >>> templates.find('https://domain.com/users/me')
+        <UrlTemplate: /users/me>
+        >>> templates.find('https://domain.com/users/42')
+        <UrlTemplate: /users/{id}>
+        >>> templates.find('https://domain.com/users/42/orders?limit=5')
+        <UrlTemplate: /users/{id}/orders?limit=*>
+        >>> print(templates.find('https://domain.com/users/42/orders'))
+        None
+        >>> 'https://cdn.com/logo.png' in templates
+        True
+        >>> 'https://domain.com/logo.png' in templates
+        False
+        >>> len(templates)
+        4
+        >>> UrlTemplateSet(['/a/{x}/c', '/{y}/b/d']).find('/a/b/d')
+        <UrlTemplate: /{y}/b/d>
+    """
+
+    def __init__(self, templates: Iterable = ()):
+        self.templates = []
+        self._roots = {}
+        for template in templates:
+            self.add(template)
+
+    def __len__(self):
+        return len(self.templates)
+
+    def __iter__(self):
+        return iter(self.templates)
+
+    def __contains__(self, url):
+        return self.find(url) is not None
+
+    def __repr__(self):
+        return '<UrlTemplateSet: %d templates>' % len(self.templates)
+
+    def add(self, template: 'UrlTemplate | str'):
+        if not isinstance(template, UrlTemplate):
+            template = UrlTemplate(template)
+        self.templates.append(template)
+        host = (template.scheme, template.netloc) if template.netloc else None
+        node = self._roots.get(host)
+        if node is None:
+            node = self._roots[host] = _UrlTrieNode()
+        segments = template.segments
+        node.depths.add(len(segments))
+        for i, segment in enumerate(segments, 1):
+            node = node.child(segment)
+            node.depths.add(len(segments) - i)
+        node.templates.append(template)
+
+    def find(self, url) -> UrlTemplate | None:
+        """Returns the first template matched to given url or ``None``.
+        Templates with literal path segments take precedence over templates
+        with parameters in the same position."""
+        parts = _url_parts(url)
+        if parts is None:
+            return None
+        segments = parts.path.split('/')
+        for host in ((parts.scheme, parts.netloc), None):
+            node = self._roots.get(host)
+            if node is not None:
+                template = node.find(segments, 0, parts.query)
+                if template is not None:
+                    return template
+        return None
+
+
+class _UrlParam:
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class _UrlTrieNode:
+    __slots__ = ('children', 'param', 'templates', 'depths')
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.templates = []
+        # Numbers of segments from this node to ends of templates
+        self.depths = set()
+
+    def child(self, segment) -> '_UrlTrieNode':
+        if isinstance(segment, _UrlParam):
+            if self.param is None:
+                self.param = _UrlTrieNode()
+            return self.param
+        node = self.children.get(segment)
+        if node is None:
+            node = self.children[segment] = _UrlTrieNode()
+        return node
+
+    def find(self, segments: list, i: int, query: frozenset):
+        if len(segments) - i not in self.depths:
+            return None
+        if i == len(segments):
+            for template in self.templates:
+                if template._match_query(query):
+                    return template
+            return None
+        segment = segments[i]
+        node = self.children.get(segment)
+        if node is not None:
+            template = node.find(segments, i + 1, query)
+            if template is not None:
+                return template
+        if self.param is not None and segment:
+            return self.param.find(segments, i + 1, query)
+        return None
+
+
+def _url_parts(url):
+    if isinstance(url, Url):
+        return url.parts
+    if isinstance(url, str):
+        try:
+            return Url(url).parts
+        except ValueError:
+            pass
+    return None
+
 
 class Dict(dict):
     """A dict object that can be compared with another dict object
@@ -96,6 +399,8 @@ class Dict(dict):
         super(Dict, self).__init__(*args, **kwargs)
 
     def __eq__(self, other):
+        if isinstance(other, BatchMapping):
+            return self._match_values(_get_many(other, list(self)))
         for key, value in self.items():
             if key not in other:
                 return False
@@ -109,6 +414,22 @@ class Dict(dict):
     def __repr__(self):
         return 'Dict(%s)' % super(Dict, self).__repr__()
 
+    def _match_values(self, other_values) -> bool:
+        for value, other_value in zip(self.values(), other_values):
+            if other_value is _MISSING or value != other_value:
+                return False
+        return True
+
+
+def _get_many(mapping: BatchMapping, keys: list) -> list:
+    values = mapping.get_many(keys, _MISSING)
+    if len(values) != len(keys):
+        raise ValueError(
+            '%s.get_many() returned %d values for %d keys'
+            % (type(mapping).__name__, len(values), len(keys))
+        )
+    return values
+
 
 class DictCi(Dict):
     """A dict object that can be compared with another dict object
@@ -144,17 +465,117 @@ class DictCi(Dict):
                     del self[key]
 
     def __eq__(self, other):
-        other_ci = {}
-        for key, value in other.items():
-            if isinstance(key, str):
-                key = key.lower()
-            other_ci[key] = value
-        return super().__eq__(other_ci)
+        if isinstance(other, CiKeyDict):
+            return super().__eq__(other)
+        # Lookup lowercased keys first, then search other variants of
+        # string keys among keys of the other mapping without loading
+        # its values, until all keys are found.
+        keys = list(self)
+        if isinstance(other, BatchMapping):
+            other_values = _get_many(other, keys)
+        else:
+            other_values = [other[key] if key in other else _MISSING for key in keys]
+        not_found = {}
+        for key, value, other_value in zip(keys, self.values(), other_values):
+            if other_value is _MISSING:
+                if not isinstance(key, str):
+                    return False
+                not_found[key] = value
+            elif value != other_value:
+                return False
+        if not not_found:
+            return True
+        for other_key in other:
+            if isinstance(other_key, str):
+                l_key = other_key.lower()
+            elif isinstance(other_key, bytes):
+                # Keys of dbm databases
+                l_key = other_key.decode('utf-8', 'replace').lower()
+            else:
+                continue
+            value = not_found.pop(l_key, _MISSING)
+            if value is _MISSING:
+                continue
+            if value != other[other_key]:
+                return False
+            if not not_found:
+                return True
+        return False
 
     def __repr__(self):
         return 'DictCi(%s)' % super(Dict, self).__repr__()
 
 
+class Attrs:
+    """An object that can be compared with any other object by values
+    of attributes named in the ``Attrs`` instance, without regard to
+    other attributes. It works with dataclasses, named tuples, classes
+    with ``__slots__``, ORM rows, etc. Only named attributes are read,
+    the other object is not converted into a dict.
+
+        >>> from dataclasses import dataclass
+        >>> @dataclass
+        ... class User:
+        ...     name: str
+        ...     age: int
+        ...     tags: list
+        >>> expected = Attrs(name='Bob', tags=List(['admin']))
+        >>> user = User('Bob', 42, ['admin', 'staff'])
+        >>> user == expected
+        True
+        >>> expected == user
+        True
+        >>> user != expected
+        False
+        >>> User('Alice', 42, ['admin']) == expected
+        False
+        >>> 1 == expected
+        False
+        >>> Attrs(name='Bob')
+        Attrs({'name': 'Bob'})
+
+    Names can contain dots to compare attributes of nested objects:
+
+        >>> class Point:
+        ...     __slots__ = ('x', 'y')
+        ...     def __init__(self, x, y):
+        ...         self.x, self.y = x, y
+        >>> from collections import namedtuple
+        >>> Segment = namedtuple('Segment', 'start end')
+        >>> segment = Segment(Point(0, 1), Point(2, 3))
+        >>> segment == Attrs({'start.x': 0, 'end': Attrs(y=3)})
+        True
+        >>> segment == Attrs({'start.z': 0})
+        False
+    """
+
+    __slots__ = ('attrs', '_getters')
+
+    def __init__(self, *args, **kwargs):
+        self.attrs = dict(*args, **kwargs)
+        self._getters = tuple(
+            (attrgetter(name), value) for name, value in self.attrs.items()
+        )
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        for getter, value in self._getters:
+            try:
+                actual = getter(other)
+            except AttributeError:
+                return False
+            if value != actual:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return 'Attrs(%r)' % self.attrs
+
+
 class List(list):
     """A list object that can be compared with other list object
     without regard to extra items contains in the other list object.
@@ -189,36 +610,232 @@ class List(list):
         >>> l3 != expected
         False
         >>> [{'a': 1}, {'b': 2}] == List([Dict(), Dict()], ignore_order=True)
-        Traceback (most recent call last):
-        ...
-        TypeError: unhashable type: 'Dict'
+        True
+
+    Any other iterable (iterator, generator, database cursor) can be compared
+    too. Items are consumed lazily - only as many as needed to decide
+    the result:
+
+        >>> items = iter([1, 'foo', True, None])
+        >>> items == List([1, 'foo'])
+        True
+        >>> next(items)
+        True
+        >>> (i for i in range(10)) == List([0, 1, 3])
+        False
+        >>> 'foo' == List(['f'])
+        False
+        >>> {1} == List([1]), {1: 1} == List([1])
+        (False, False)
+
+    Argument ``exhausted`` requires that the other object has no extra items,
+    argument ``max_len`` limits the number of items in the other object:
+
+        >>> List([0, 1], exhausted=True) == iter(range(2))
+        True
+        >>> List([0, 1], exhausted=True) == iter(range(3))
+        False
+        >>> List([0], max_len=3) == iter(range(3))
+        True
+        >>> List([0], max_len=3) == iter(range(4))
+        False
+        >>> List([0], max_len=3)
+        List([0], max_len=3)
+
+    With ``ignore_order=True`` every expected item must be equal to any
+    item of the other object, as in the case of sets - one item may be
+    equal to many expected items, so the number of items is not checked.
+    Argument ``exhausted`` requires that every item of the other object
+    is equal to any expected item. Unhashable items and matchers are
+    compared one by one:
+
+        >>> [1, 2] == List([1, 1], ignore_order=True)
+        True
+        >>> iter([1, 2]) == List([1, 1], ignore_order=True)
+        True
+        >>> [1] == List([1, 1], ignore_order=True)
+        True
+        >>> iter([1]) == List([1, 1], ignore_order=True)
+        True
+        >>> [1] == List([1, 1], ignore_order=True, exhausted=True)
+        True
+        >>> iter([1]) == List([1, 1], ignore_order=True, exhausted=True)
+        True
+        >>> [2, 1] == List([1], ignore_order=True, exhausted=True)
+        False
+        >>> iter([2, 1]) == List([1], ignore_order=True, exhausted=True)
+        False
+        >>> iter([{'a': 1}, {'b': 2}]) == List([Dict(), Dict(a=1)], ignore_order=True)
+        True
+        >>> [{'a': 1}, {'b': 2}] == List([Dict(), Dict(a=1)], ignore_order=True)
+        True
+        >>> iter([{'a': 1}]) == List([Dict(), Dict(b=2)], ignore_order=True)
+        False
+        >>> expected = List([RoundFloat(1.235, 3), CiStr('foo')], ignore_order=True)
+        >>> [1.2347, 'FOO'] == expected
+        True
+
+    Use method ``amatch()`` to compare with an asynchronous iterator
+    or an awaitable:
+
+        >>> import asyncio
+        >>> async def numbers():
+        ...     for i in range(10):
+        ...         yield i
+        >>> asyncio.run(List([0, 1, 2]).amatch(numbers()))
+        True
+        >>> asyncio.run(List([0, 2]).amatch(numbers()))
+        False
     """
 
-    def __init__(self, *args, ignore_order=False, **kwargs):
+    def __init__(
+        self,
+        *args,
+        ignore_order=False,
+        exhausted=False,
+        max_len: int | None = None,
+        **kwargs,
+    ):
         super(List, self).__init__(*args, **kwargs)
         self.ignore_order = ignore_order
+        self.exhausted = exhausted
+        self.max_len = max_len
 
     def __eq__(self, other):
-        if not isinstance(other, list):
+        if isinstance(other, list):
+            return self._match_list(other)
+        if not isinstance(other, Iterable):
             return False
-        if len(self) > len(other):
+        if isinstance(other, (str, bytes, Mapping, Set)):
+            # Sets have no order of items
             return False
-        if self.ignore_order:
-            return len(set(self) - set(other)) == 0
-        for v1, v2 in zip(self, other):
-            if v1 != v2:
-                return False
-        return True
+        return _consume(_ListMatcher(self), other)
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    async def amatch(self, other) -> bool:
+        """Compares this object with an asynchronous iterator, an awaitable
+        or any other object supported by ``__eq__()``. Items of the async
+        iterator are consumed lazily, as in the case of a plain iterator."""
+        if inspect.isawaitable(other):
+            other = await other
+        if isinstance(other, AsyncIterable):
+            return await _aconsume(_ListMatcher(self), other)
+        return self.__eq__(other)
+
     def __repr__(self):
         suffix = ''
         if self.ignore_order:
-            suffix = ', ignore_order=True'
+            suffix += ', ignore_order=True'
+        if self.exhausted:
+            suffix += ', exhausted=True'
+        if self.max_len is not None:
+            suffix += ', max_len=%r' % self.max_len
         return 'List(%s%s)' % (super(List, self).__repr__(), suffix)
 
+    def _match_list(self, other: list) -> bool:
+        if self.max_len is not None and len(other) > self.max_len:
+            return False
+        if self.ignore_order:
+            for v in _not_found(self, other):
+                if not any(v == item for item in other):
+                    return False
+            if self.exhausted:
+                for item in _not_found(other, self):
+                    if not any(v == item for v in self):
+                        return False
+            return True
+        if len(self) > len(other):
+            return False
+        if self.exhausted and len(self) != len(other):
+            return False
+        for v1, v2 in zip(self, other):
+            if v1 != v2:
+                return False
+        return True
+
+
+class _ListMatcher:
+    """Incremental comparison of ``List`` with a stream of items.
+
+    Method ``feed()`` returns ``True`` or ``False`` as soon as the result
+    is known, or ``None`` if more items are needed. Method ``finish()``
+    returns the result after the end of the stream.
+    """
+
+    __slots__ = ('expected', 'pending', 'count', 'result', 'need_tail')
+
+    def __init__(self, expected: List):
+        self.expected = expected
+        self.pending = list(expected) if expected.ignore_order else None
+        self.count = 0
+        self.need_tail = expected.exhausted or expected.max_len is not None
+        self.result = None if len(expected) or self.need_tail else True
+
+    def feed(self, item):
+        expected = self.expected
+        count = self.count
+        self.count = count + 1
+        pending = self.pending
+        if pending is not None:
+            if expected.exhausted and not any(v == item for v in expected):
+                return False
+            pending[:] = [v for v in pending if v != item]
+            matched = not pending
+        elif count < len(expected):
+            if expected[count] != item:
+                return False
+            matched = count + 1 == len(expected)
+        else:
+            matched = True
+
+        if matched and not self.need_tail:
+            return True
+        if expected.exhausted and pending is None and count >= len(expected):
+            return False
+        if expected.max_len is not None and count >= expected.max_len:
+            return False
+        return None
+
+    def finish(self) -> bool:
+        if self.pending is not None:
+            return not self.pending
+        return self.count >= len(self.expected)
+
+
+def _not_found(values, items):
+    """Returns values which are not found in items by hash,
+    or all values if some of them are unhashable."""
+    try:
+        return set(values) - set(items)
+    except TypeError:
+        return values
+
+
+def _consume(matcher, iterable) -> bool:
+    result = matcher.result
+    if result is None:
+        for item in iterable:
+            result = matcher.feed(item)
+            if result is not None:
+                break
+        else:
+            result = matcher.finish()
+    return result
+
+
+async def _aconsume(matcher, aiterable) -> bool:
+    result = matcher.result
+    if result is None:
+        async for item in aiterable:
+            result = matcher.feed(item)
+            if result is not None:
+                break
+        else:
+            result = matcher.finish()
+    return result
+
 
 class AnyValue:
     """Instance of this class is equal to any other values.
@@ -349,6 +966,25 @@ class Json:
         True
         >>> '"json str"' == Json('json str')
         True
+
+    Use method ``amatch()`` to compare with an asynchronous iterator
+    of ``bytes`` or ``str`` chunks (e.g. a body of HTTP-response)
+    or an awaitable:
+
+        >>> import asyncio
+        >>> async def body(*chunks):
+        ...     for chunk in chunks:
+        ...         yield chunk
+        >>> asyncio.run(v.amatch(body(b'{"bar": "hel', b'lo", "foo": 1}')))
+        True
+        >>> asyncio.run(v.amatch(body(b'{"bar": "\\xff', b'lo", "foo": 1}')))
+        False
+        >>> asyncio.run(v.amatch(body({'bar': 'hello', 'foo': 1})))
+        False
+
+    The whole stream is buffered in memory before decoding, because
+    JSON document can be decoded only as a whole. Use ``JsonLines``
+    to compare large streams of records.
     """
 
     def __init__(self, value, **kwargs):
@@ -379,10 +1015,239 @@ class Json:
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    async def amatch(self, other) -> bool:
+        """Compares this object with an asynchronous iterator of chunks,
+        an awaitable or any other object supported by ``__eq__()``.
+
+        JSON document can be decoded only as a whole, so all chunks are
+        collected into a string in memory. But bytes are decoded from UTF-8
+        incrementally, and reading is stopped at the first invalid chunk
+        or a chunk that is not ``str`` or ``bytes``.
+        """
+        if inspect.isawaitable(other):
+            other = await other
+        if not isinstance(other, AsyncIterable):
+            return self.__eq__(other)
+        decoder = _utf8_decoder()
+        parts = []
+        try:
+            async for chunk in other:
+                if isinstance(chunk, bytes):
+                    chunk = decoder.decode(chunk)
+                elif not isinstance(chunk, str):
+                    return False
+                parts.append(chunk)
+            parts.append(decoder.decode(b'', final=True))
+        except UnicodeDecodeError:
+            return False
+        return self.__eq__(''.join(parts))
+
     def __repr__(self):
         return '<Json: %r>' % self.value
 
 
+_utf8_decoder = codecs.getincrementaldecoder('utf-8')
+
+
+class JsonLines:
+    """An instance of this class will be equal to a JSON Lines (NDJSON) stream
+    if records decoded by JSON-decoder from lines of this stream are equal
+    to the first argument of this class.
+
+    Records are compared with an instance of ``List`` (a plain list is
+    converted into ``List``), so the stream may contain extra records after
+    expected ones. The stream is decoded line by line and reading stops
+    at the first mismatch.
+
+        >>> v = JsonLines([{'foo': 1}, Dict(bar='hello')])
+        >>> other = '{"foo": 1}\\n{"bar": "hello", "id": 2}\\n{"foo": 3}\\n'
+        >>> v == other
+        True
+        >>> other == v
+        True
+        >>> other != v
+        False
+        >>> v == b'{"foo": 1}\\n{"bar": "bye"}\\n'
+        False
+        >>> v == '{"foo": 1}\\nnot json\\n'
+        False
+        >>> JsonLines([{'text': 'a\\u2028b'}]) == '{"text": "a\\u2028b"}\\n'
+        True
+        >>> v == 1
+        False
+        >>> v == [{'foo': 1}, {'bar': 'hello'}]
+        False
+        >>> v == ['{"foo": 1}\\n', b'{"bar": "hello"}\\n']
+        False
+        >>> Dict(log=v) == {'log': [{'foo': 1}]}
+        False
+        >>> v
+        <JsonLines: List([{'foo': 1}, Dict({'bar': 'hello'})])>
+
+    Other object may be a path to a file (an instance of ``os.PathLike``),
+    a file object or any iterable of ``bytes`` or ``str`` chunks.
+    Chunks don't have to be aligned to lines:
+
+        >>> chunks = iter([b'{"foo": 1}\\n{"bar"', b': "hello"}\\n', b'{"foo": 3}\\n'])
+        >>> v == chunks
+        True
+        >>> next(chunks)
+        b'{"foo": 3}\\n'
+        >>> import io
+        >>> v == io.BytesIO(b'{"foo": 1}\\n\\n{"bar": "hello"}')
+        True
+
+    Use ``List`` with required arguments to compare records
+    without regard of ordering or to check the number of records:
+
+        >>> v = JsonLines(List([{'foo': 3}, {'foo': 1}], ignore_order=True))
+        >>> v == '{"foo": 1}\\n{"foo": 2}\\n{"foo": 3}\\n'
+        True
+        >>> v = JsonLines(List([Dict(), Dict(foo=1)], ignore_order=True))
+        >>> v == '{"foo": 1}\\n{"bar": 2}\\n'
+        True
+        >>> v = JsonLines(List([{'foo': 1}], exhausted=True))
+        >>> v == '{"foo": 1}\\n{"foo": 2}\\n'
+        False
+
+    Use method ``amatch()`` to compare with an asynchronous iterator
+    of chunks (e.g. ``asyncio.StreamReader``) or an awaitable:
+
+        >>> import asyncio
+        >>> async def events():
+        ...     yield b'{"foo": 1}\\n{"fo'
+        ...     yield b'o": 2}\\n'
+        ...     raise AssertionError('must not be read')
+        >>> asyncio.run(JsonLines([{'foo': 1}, {'foo': 2}]).amatch(events()))
+        True
+        >>> async def numbers():
+        ...     yield 1
+        >>> asyncio.run(JsonLines([{'foo': 1}]).amatch(numbers()))
+        False
+    """
+
+    def __init__(self, records, **kwargs):
+        if not isinstance(records, List):
+            records = List(records)
+        self.records = records
+        self.kwargs = kwargs
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return self.records == other.records
+
+        if isinstance(other, (bytes, str)):
+            return self._match(_iter_lines((other,)))
+        if isinstance(other, os.PathLike):
+            with open(other, 'rb') as f:
+                return self._match(_iter_lines(f))
+        if not isinstance(other, Iterable) or isinstance(other, Mapping):
+            return False
+        return self._match(_iter_lines(other))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    async def amatch(self, other) -> bool:
+        """Compares this object with an asynchronous iterator of chunks,
+        an awaitable or any other object supported by ``__eq__()``.
+        The stream is decoded line by line as in the case of ``__eq__()``."""
+        if inspect.isawaitable(other):
+            other = await other
+        if not isinstance(other, AsyncIterable):
+            return self.__eq__(other)
+        try:
+            return await _aconsume(
+                _ListMatcher(self.records),
+                self._aiter_records(_aiter_lines(other)),
+            )
+        except ValueError:
+            return False
+
+    def __repr__(self):
+        return '<JsonLines: %r>' % self.records
+
+    def _match(self, lines) -> bool:
+        try:
+            return _consume(_ListMatcher(self.records), self._iter_records(lines))
+        except ValueError:
+            return False
+
+    def _iter_records(self, lines):
+        loads = json.loads
+        kwargs = self.kwargs
+        for line in lines:
+            if line.strip():
+                yield loads(line, **kwargs)
+
+    async def _aiter_records(self, lines):
+        loads = json.loads
+        kwargs = self.kwargs
+        async for line in lines:
+            if line.strip():
+                yield loads(line, **kwargs)
+
+
+def _iter_lines(chunks):
+    """Splits a stream of ``bytes`` or ``str`` chunks into lines lazily.
+
+    Only ``\\n`` is a line separator, other line breaks (``\\r``, ``\\u2028``)
+    may stand unescaped inside of JSON strings.
+    """
+    tail = None
+    sep = None
+    for chunk in chunks:
+        sep = _line_separator(chunk, sep)
+        if tail:
+            chunk = tail + chunk
+        start = 0
+        end = chunk.find(sep)
+        while end >= 0:
+            yield chunk[start:end]
+            start = end + 1
+            end = chunk.find(sep, start)
+        tail = chunk[start:]
+    if tail:
+        yield tail
+
+
+def _line_separator(chunk, sep):
+    """Returns the line separator for given chunk of a stream, ``sep`` is
+    the separator for previous chunks. Raises ``ValueError`` if the chunk is
+    not ``str`` or ``bytes``, or its type differs from previous chunks."""
+    if isinstance(chunk, bytes):
+        chunk_sep = b'\n'
+    elif isinstance(chunk, str):
+        chunk_sep = '\n'
+    else:
+        raise ValueError('Chunk of a stream must be str or bytes: %r' % (chunk,))
+    if sep is not None and type(sep) is not type(chunk_sep):
+        raise ValueError('Chunks of a stream must be all str or all bytes')
+    return chunk_sep
+
+
+async def _aiter_lines(chunks):
+    """Splits an asynchronous stream of ``bytes`` or ``str`` chunks into
+    lines lazily, as ``_iter_lines()`` does."""
+    tail = None
+    sep = None
+    async for chunk in chunks:
+        sep = _line_separator(chunk, sep)
+        if tail:
+            chunk = tail + chunk
+        start = 0
+        end = chunk.find(sep)
+        while end >= 0:
+            yield chunk[start:end]
+            start = end + 1
+            end = chunk.find(sep, start)
+        tail = chunk[start:]
+    if tail:
+        yield tail
+
+
 class CiStr:
     """An instance of this class is compared with strings case-insensitively.
 
@@ -444,9 +1309,202 @@ class CiStr:
     def __repr__(self):
         return '<CiStr: %r>' % self.value
 
+    def _index_keys(self):
+        return 'ci', _ci_key, (self.value,)
+
+
+def _ci_key(value):
+    if isinstance(value, CiStr):
+        return value.value
+    if isinstance(value, str):
+        return value.lower()
+    return _NO_KEY
+
+
+class CiSet(MutableSet):
+    """A set with case-insensitive membership of strings.
+
+    String items (and ``CiStr`` instances) are stored lowercased,
+    or case-folded with ``str.casefold()`` if argument ``casefold``
+    is ``True``. Other items are stored as is.
+
+    >>> headers = CiSet(['Content-Type', 'User-Agent', 1])
+    >>> 'content-type' in headers
+    True
+    >>> CiStr('USER-AGENT') in headers
+    True
+    >>> 'accept' in headers
+    False
+    >>> 1 in headers
+    True
+    >>> headers
+    CiSet({'content-type', 'user-agent', 1})
+    >>> headers.add('Accept')
+    >>> headers.discard('CONTENT-TYPE')
+    >>> headers
+    CiSet({'user-agent', 1, 'accept'})
+    >>> headers == {'User-Agent', 'ACCEPT', 1}
+    True
+    >>> {'USER-AGENT'} <= headers, headers < {'user-agent'}
+    (True, False)
+    >>> 'STRASSE' in CiSet(['Straße'])
+    False
+    >>> 'STRASSE' in CiSet(['Straße'], casefold=True)
+    True
+    """
+
+    __slots__ = ('_items', 'casefold')
+
+    def __init__(self, iterable: Iterable = (), casefold=False):
+        self.casefold = casefold
+        self._items = dict.fromkeys(_fold_key(v, casefold) for v in iterable)
+
+    def __contains__(self, value):
+        return _fold_key(value, self.casefold) in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, value):
+        self._items[_fold_key(value, self.casefold)] = None
+
+    def discard(self, value):
+        self._items.pop(_fold_key(value, self.casefold), None)
+
+    def _from_iterable(self, iterable):
+        return self.__class__(iterable, casefold=self.casefold)
+
+    # Comparisons provided by Set are case-sensitive for items
+    # of the other set, so these items are folded before comparison.
+
+    def __eq__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._items.keys() == self._fold_items(other)
+
+    def __le__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._items.keys() <= self._fold_items(other)
+
+    def __lt__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._items.keys() < self._fold_items(other)
+
+    def __ge__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._items.keys() >= self._fold_items(other)
+
+    def __gt__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return self._items.keys() > self._fold_items(other)
+
+    def _fold_items(self, other: Set):
+        if isinstance(other, CiSet) and other.casefold == self.casefold:
+            return other._items.keys()
+        casefold = self.casefold
+        return {_fold_key(v, casefold) for v in other}
+
+    def __repr__(self):
+        return 'CiSet({%s})' % ', '.join(map(repr, self._items))
+
+
+class CiKeyDict(MutableMapping):
+    """A dict with case-insensitive string keys.
+
+    String keys (and ``CiStr`` instances) are stored lowercased, as in
+    ``DictCi``, or case-folded with ``str.casefold()`` if argument
+    ``casefold`` is ``True``. Other keys are stored as is.
+
+    >>> headers = CiKeyDict({'Content-Type': 'text/plain'})
+    >>> headers['CONTENT-TYPE']
+    'text/plain'
+    >>> headers[CiStr('content-type')]
+    'text/plain'
+    >>> headers['User-Agent'] = 'curl'
+    >>> 'user-agent' in headers
+    True
+    >>> headers.get('Accept', 'none')
+    'none'
+    >>> headers
+    CiKeyDict({'content-type': 'text/plain', 'user-agent': 'curl'})
+    >>> headers == {'User-Agent': 'curl', 'content-type': 'text/plain'}
+    True
+    >>> headers == DictCi({'User-agent': 'curl'})
+    True
+    >>> del headers['USER-AGENT']
+    >>> len(headers)
+    1
+    """
+
+    __slots__ = ('_data', 'casefold')
+
+    def __init__(self, *args, casefold=False, **kwargs):
+        self.casefold = casefold
+        self._data = {}
+        self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        return self._data[_fold_key(key, self.casefold)]
+
+    def __setitem__(self, key, value):
+        self._data[_fold_key(key, self.casefold)] = value
+
+    def __delitem__(self, key):
+        del self._data[_fold_key(key, self.casefold)]
+
+    def __contains__(self, key):
+        return _fold_key(key, self.casefold) in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        if isinstance(other, Dict):
+            return other.__eq__(self)
+        if len(self) != len(other):
+            return False
+        casefold = self.casefold
+        data = self._data
+        for key, value in other.items():
+            key = _fold_key(key, casefold)
+            if key not in data or data[key] != value:
+                return False
+        return True
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return 'CiKeyDict(%r)' % self._data
+
+
+def _fold_key(key, casefold: bool):
+    if isinstance(key, CiStr):
+        key = key.value
+    elif isinstance(key, str):
+        key = key.lower()
+    else:
+        return key
+    return key.casefold() if casefold else key
+
 
 class RoundFloat:
-    """An instance of this class is compared with floats rounded to
+    """An instance of this class is compared with numbers rounded to
     given precision in decimal digits.
 
     >>> v = RoundFloat(1.23456789, 3)
@@ -479,22 +1537,120 @@ class RoundFloat:
     False
     >>> [v, v, v] == [other, other, other]
     True
-    """
 
-    __slots__ = ('value', 'ndigits')
+    The interval of numbers rounded to the value of this object is
+    calculated once, so a comparison takes only two boundary checks.
+    Numbers are rounded half to even, as ``round()`` does, so bounds
+    of the interval are inclusive if the last digit of the value is even
+    and exclusive otherwise. Instances of ``Decimal``, ``Fraction`` and
+    ``int`` are compared with exact bounds of the interval, ``float``
+    and other real numbers (e.g. NumPy scalars) - with the closest
+    ``float`` bounds.
+
+    >>> from decimal import Decimal
+    >>> from fractions import Fraction
+    >>> v == Decimal('1.2346'), v == Decimal('1.2355'), v == Decimal('NaN')
+    (True, False, False)
+    >>> v == Fraction(2469, 2000), v == Fraction(247, 200)
+    (False, True)
+    >>> RoundFloat(0.5, 0) == 0.5, RoundFloat(2.5, 0) == 2.5, RoundFloat(1.5, 0) == 1.5
+    (True, True, True)
+    >>> RoundFloat(0.125, 2) == 0.125, RoundFloat(0.13, 2) == 0.125
+    (True, False)
+    >>> RoundFloat(1250, -2) == 1250, RoundFloat(1250, -2) == 1350
+    (True, False)
+    >>> RoundFloat(Decimal('2.5'), 0) == Decimal('2.5')
+    True
+    >>> RoundFloat(3, 0) == Decimal('2.5')
+    False
+    >>> RoundFloat(float('inf'), 2) == float('inf')
+    True
+
+    A float is rounded from its exact binary value, not from its shortest
+    decimal representation, so precision may be greater than precision
+    of ``float``.
+
+    >>> RoundFloat(0.1, 17) == 0.1, RoundFloat(0.1, 20) == 0.1
+    (True, True)
+    >>> RoundFloat(0.1, 20) == Decimal('0.1'), RoundFloat(Decimal('0.1'), 20) == 0.1
+    (False, False)
+    >>> RoundFloat(0.1, 20) in MatcherIndex([0.2, 0.1])
+    True
+
+    Instances of ``RoundFloat`` are equal if their rounded values are equal,
+    regardless of types of given numbers.
+
+    >>> RoundFloat(Decimal('1.235'), 3) == RoundFloat(1.235, 3)
+    True
+    >>> RoundFloat(Fraction(247, 200), 3) == RoundFloat(1.235, 3)
+    True
+    >>> len({RoundFloat(Decimal('1.235'), 3), RoundFloat(1.235, 3)})
+    1
+    """
 
-    def __init__(self, value: int | float, ndigits: int):
-        self.value = round(value, ndigits)
+    __slots__ = (
+        'value',
+        'ndigits',
+        '_low',
+        '_high',
+        '_exact_low',
+        '_exact_high',
+        '_inclusive',
+        '_center',
+    )
+
+    def __init__(self, value: int | float | Decimal | Fraction, ndigits: int):
+        value = _builtin_number(value)
+        with localcontext(_EXACT_CONTEXT):
+            center = _to_decimal(value, ndigits)
+            # Infinities and NaN are not rounded
+            self.value = value if center is None else round(value, ndigits)
         self.ndigits = ndigits
+        self._center = center
+        if center is None:
+            # Infinity or NaN
+            self._low = self._high = float(self.value)
+            self._exact_low = self._exact_high = None
+            self._inclusive = True
+            return
+        with localcontext(_EXACT_CONTEXT):
+            half = Decimal(5).scaleb(-ndigits - 1)
+            self._exact_low = center - half
+            self._exact_high = center + half
+            # A tie is rounded to the value if its last digit is even
+            self._inclusive = center.scaleb(ndigits) % 2 == 0
+        # Floats closest to exact bounds inside of the interval,
+        # a float is in the exact interval if it is in the closed
+        # interval of these floats.
+        self._low = _float_bound(Fraction(self._exact_low), self._inclusive, math.inf)
+        self._high = _float_bound(
+            Fraction(self._exact_high), self._inclusive, -math.inf
+        )
 
     def __hash__(self):
-        return hash(self.value)
+        if self._center is None:
+            return hash(self.value)
+        return hash(self._center)
 
     def __eq__(self, other):
+        if type(other) is float or (
+            type(other) is int and -_MAX_FLOAT_INT <= other <= _MAX_FLOAT_INT
+        ):
+            return self._low <= other <= self._high
         if isinstance(other, self.__class__):
-            return self.value == other.value
-        if isinstance(other, (int, float)):
-            other = round(other, self.ndigits)
+            if self._center is None or other._center is None:
+                return self.value == other.value
+            return self._center == other._center
+        if isinstance(other, (int, Decimal, Fraction)):
+            if self._exact_low is None:
+                return self.value == other
+            if isinstance(other, Decimal) and other.is_nan():
+                return False
+            if self._inclusive:
+                return self._exact_low <= other <= self._exact_high
+            return self._exact_low < other < self._exact_high
+        if isinstance(other, Real):
+            return self._low <= other <= self._high
         return self.value == other
 
     def __ne__(self, other):
@@ -503,13 +1659,196 @@ class RoundFloat:
     def __repr__(self):
         return '<RoundFloat: %r>' % self.value
 
+    def _index_keys(self):
+        ndigits = self.ndigits
+        key = _round_key(ndigits, self)
+        return ('round', ndigits), partial(_round_key, ndigits), (key,)
+
+
+def _round_key(ndigits, value):
+    """Returns the rounded number as ``float``. Numbers equal
+    to a ``RoundFloat`` have the same key as this ``RoundFloat``."""
+    if isinstance(value, RoundFloat):
+        value = value.value if value._center is None else value._center
+    elif isinstance(value, (Decimal, Fraction, int, float)):
+        with localcontext(_EXACT_CONTEXT):
+            try:
+                value = round(value, ndigits)
+            except (ArithmeticError, ValueError):
+                # Infinity or NaN
+                pass
+    elif isinstance(value, Real):
+        value = round(float(value), ndigits)
+    else:
+        return _NO_KEY
+    try:
+        return float(value)
+    except OverflowError:
+        return _NO_KEY
+
+
+# Context of decimal arithmetic without rounding
+_EXACT_CONTEXT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+# Integers in this range are exactly representable as floats
+_MAX_FLOAT_INT = 2**53
+
+
+def _builtin_number(value):
+    """Converts subclasses of built-in numbers and other numbers
+    (e.g. NumPy scalars) into ``int`` or ``float``."""
+    if type(value) is int or type(value) is float:
+        return value
+    if isinstance(value, (Decimal, Fraction)):
+        return value
+    if isinstance(value, Integral):
+        return int(value)
+    if isinstance(value, Real):
+        return float(value)
+    return value
+
+
+def _float_bound(bound: Fraction, inclusive: bool, direction: float) -> float:
+    """Returns the float closest to the exact bound inside of the interval
+    that lies in given direction from the bound."""
+    try:
+        result = float(bound)
+    except OverflowError:
+        return -direction
+    if result == bound:
+        if not inclusive:
+            result = math.nextafter(result, direction)
+    elif (result < bound) == (direction > 0):
+        result = math.nextafter(result, direction)
+    return result
+
+
+def _to_decimal(value, ndigits: int) -> Decimal | None:
+    """Returns exact decimal value of a number rounded to given precision
+    or ``None`` for infinities and NaN. Must be called in the exact context.
+    """
+    if isinstance(value, Fraction):
+        value = round(value, ndigits)
+        return Decimal(value.numerator) / value.denominator
+    if isinstance(value, Decimal) and not value.is_finite():
+        return None
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    # A float is converted into decimal exactly, without rounding
+    # of its shortest repr.
+    return Decimal(value).quantize(Decimal(1).scaleb(-ndigits), ROUND_HALF_EVEN)
+
+
+class MatcherIndex:
+    """A collection of values for fast search of values that are equal
+    to a given expected value or matcher.
+
+    Values are bucketed by normalized keys of hashable matchers
+    (lowercased string for ``CiStr``, rounded number for ``RoundFloat``,
+    parsed parts for ``Url``), so a search costs O(1) for such matchers.
+    Buckets are built lazily on the first search with a matcher of
+    given kind. Plain hashable values are searched as in a ``set``.
+    Other matchers (``ANY``, ``RegExpString``, ``Json``, ``Dict``, etc.)
+    are compared with all values one by one.
+
+    Search is safe for concurrent use from many threads. Buckets of each
+    kind are built only once under a lock, after that searches
+    don't take any locks. Don't modify ``values`` after the first search.
+
+        >>> index = MatcherIndex(['Content-Type', 1.2347, 'https://a.com/?x=1&y=2'])
+        >>> CiStr('content-type') in index
+        True
+        >>> CiStr('user-agent') in index
+        False
+        >>> RoundFloat(1.23456789, 3) in index
+        True
+        >>> Url('https://a.com/?y=2&x=1') in index
+        True
+        >>> RegExpString('https://') in index
+        True
+        >>> 1.2347 in index
+        True
+        >>> index.find(RegExpString('.*t'))
+        ['Content-Type', 'https://a.com/?x=1&y=2']
+        >>> len(index)
+        3
+    """
+
+    def __init__(self, values: Iterable = ()):
+        self.values = list(values)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __contains__(self, expected):
+        for _ in self._iter_matches(expected):
+            return True
+        return False
+
+    def __repr__(self):
+        return '<MatcherIndex: %d values>' % len(self.values)
+
+    def find(self, expected) -> list:
+        """Returns all values that are equal to given expected value."""
+        return list(self._iter_matches(expected))
+
+    def _iter_matches(self, expected):
+        return (v for v in self._candidates(expected) if expected == v)
+
+    def _candidates(self, expected):
+        index_keys = getattr(expected, '_index_keys', None)
+        if index_keys is not None:
+            kind, normalize, keys = index_keys()
+        elif getattr(expected, '__hash__', None) is not None:
+            kind, normalize, keys = None, _hashable_key, (expected,)
+        else:
+            return self.values
+        buckets = self._buckets.get(kind)
+        if buckets is None:
+            with self._lock:
+                buckets = self._buckets.get(kind)
+                if buckets is None:
+                    buckets = self._build_buckets(normalize)
+                    self._buckets[kind] = buckets
+        try:
+            return chain.from_iterable([buckets.get(key, ()) for key in keys])
+        except TypeError:
+            return self.values
+
+    def _build_buckets(self, normalize) -> dict:
+        buckets = {}
+        for value in self.values:
+            key = normalize(value)
+            if key is _NO_KEY:
+                continue
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [value]
+            else:
+                bucket.append(value)
+        return buckets
+
+
+def _hashable_key(value):
+    try:
+        hash(value)
+    except TypeError:
+        return _NO_KEY
+    return value
+
 
 # Short aliases
 ANY = AnyValue()
 D = Dict
 DCI = DictCi
+A = Attrs
 L = List
 R = RegExpString
 J = Json
+JL = JsonLines
 CI = CiStr
 RF = RoundFloat
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+:Authors: cykooz
+:Date: 19.10.2026
+"""
+
+import sqlite3
+from abc import abstractmethod
+from collections.abc import Iterable, Mapping
+from typing import Any, Callable
+
+
+__all__ = ('BatchMapping', 'SqliteMapping')
+
+
+class BatchMapping(Mapping):
+    """Abstract mapping that loads values of many keys at once.
+
+    ``Dict`` and ``DictCi`` call method ``get_many()`` only for instances
+    of this class, other objects with method of the same name (e.g. caches
+    returning a dict) are compared by lookups of single keys. Classes with
+    a compatible method can be registered with ``BatchMapping.register()``.
+
+        >>> class Store(BatchMapping):
+        ...     def __init__(self, data):
+        ...         self.data = data
+        ...     def __getitem__(self, key):
+        ...         return self.data[key]
+        ...     def __iter__(self):
+        ...         return iter(self.data)
+        ...     def __len__(self):
+        ...         return len(self.data)
+        ...     def get_many(self, keys, default=None):
+        ...         print('get_many(%r)' % list(keys))
+        ...         return [self.data.get(key, default) for key in keys]
+        >>> from cykooz.testing import Dict
+        >>> Dict(a=1, b=2) == Store({'a': 1, 'b': 2, 'c': 3})
+        get_many(['a', 'b'])
+        True
+
+    Values of other objects are looked up one by one, even if they have
+    method ``get_many()`` with other semantics:
+
+        >>> class Cache(dict):
+        ...     def get_many(self, keys):
+        ...         return {key: self[key] for key in keys if key in self}
+        >>> Dict(a=1) == Cache(a=1, b=2)
+        True
+
+    ``ValueError`` is raised if ``get_many()`` returns a wrong number
+    of values:
+
+        >>> class BrokenStore(Store):
+        ...     def get_many(self, keys, default=None):
+        ...         return [self.data[key] for key in keys if key in self.data]
+        >>> Dict(a=1, x=2) == BrokenStore({'a': 1})
+        Traceback (most recent call last):
+        ...
+        ValueError: BrokenStore.get_many() returned 1 values for 2 keys
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def get_many(self, keys: Iterable, default=None) -> list:
+        """Returns a list of values of given keys in the same order,
+        ``default`` is used for absent keys."""
+        raise NotImplementedError
+
+
+class SqliteMapping(BatchMapping):
+    """Read-only mapping over a key-value table of SQLite database.
+
+    Values are loaded lazily on access, ``loads`` (e.g. ``json.loads``)
+    is applied to each loaded value. Method ``get_many()`` loads values
+    of many keys by one query, ``Dict`` and ``DictCi`` use it to look up
+    all keys of one nesting level at once.
+
+        >>> import json
+        >>> from cykooz.testing import Dict, DictCi, ANY
+        >>> conn = sqlite3.connect(':memory:')
+        >>> _ = conn.execute('CREATE TABLE kv (key TEXT PRIMARY KEY, value TEXT)')
+        >>> _ = conn.executemany(
+        ...     'INSERT INTO kv VALUES (?, ?)',
+        ...     [('user:%d' % i, json.dumps({'id': i})) for i in range(10000)],
+        ... )
+        >>> store = SqliteMapping(conn, 'kv', loads=json.loads)
+        >>> store['user:42']
+        {'id': 42}
+        >>> len(store)
+        10000
+        >>> conn.set_trace_callback(print)
+        >>> store == Dict({'user:1': {'id': 1}, 'user:5': Dict(id=ANY)})
+        SELECT "key", "value" FROM "kv" WHERE "key" IN ('user:1','user:5')
+        True
+        >>> store == DictCi({'USER:7': {'id': 7}})
+        SELECT "key", "value" FROM "kv" WHERE "key" IN ('user:7')
+        True
+        >>> store == Dict({'user:1': {'id': 1}, 'unknown': 1})
+        SELECT "key", "value" FROM "kv" WHERE "key" IN ('user:1','unknown')
+        False
+        >>> conn.set_trace_callback(None)
+    """
+
+    # Max number of parameters of one query in old versions of SQLite
+    chunk_size = 999
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        table: str,
+        key: str = 'key',
+        value: str = 'value',
+        loads: Callable[[Any], Any] | None = None,
+    ):
+        self.connection = connection
+        self.loads = loads
+        table = _quote(table)
+        key = _quote(key)
+        value = _quote(value)
+        self._select_value = 'SELECT %s FROM %s WHERE %s = ?' % (value, table, key)
+        self._select_exists = 'SELECT 1 FROM %s WHERE %s = ?' % (table, key)
+        self._select_keys = 'SELECT %s FROM %s' % (key, table)
+        self._select_count = 'SELECT COUNT(*) FROM %s' % table
+        self._select_many = 'SELECT %s, %s FROM %s WHERE %s IN (%%s)' % (
+            key,
+            value,
+            table,
+            key,
+        )
+
+    def __getitem__(self, key):
+        row = self.connection.execute(self._select_value, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._load(row[0])
+
+    def __contains__(self, key):
+        row = self.connection.execute(self._select_exists, (key,)).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        for row in self.connection.execute(self._select_keys):
+            yield row[0]
+
+    def __len__(self):
+        return self.connection.execute(self._select_count).fetchone()[0]
+
+    def get_many(self, keys: Iterable, default=None) -> list:
+        keys = list(keys)
+        found = {}
+        for i in range(0, len(keys), self.chunk_size):
+            chunk = keys[i : i + self.chunk_size]
+            query = self._select_many % ','.join('?' * len(chunk))
+            found.update(self.connection.execute(query, chunk))
+        return [self._load(found[key]) if key in found else default for key in keys]
+
+    def __eq__(self, other):
+        # Comparison of mappings provided by Mapping loads all items,
+        # let helpers like Dict compare with this mapping instead.
+        if other is self:
+            return True
+        return NotImplemented
+
+    __hash__ = None
+
+    def _load(self, value):
+        return value if self.loads is None else self.loads(value)
+
+    def __repr__(self):
+        return '<SqliteMapping: %s>' % self._select_keys
+
+
+def _quote(name: str) -> str:
+    return '"%s"' % name.replace('"', '""')
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+:Authors: cykooz
+:Date: 19.10.2026
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from functools import partial
+
+
+__all__ = (
+    'ComparisonMemo',
+    'Memoized',
+)
+
+
+class ComparisonMemo:
+    """LRU-cache of results of comparisons of expected values (matchers)
+    with actual values.
+
+    Results are keyed by identity of the expected value, identity of
+    the actual value and optional version token. The cache holds
+    a reference to the expected value and a weak reference to the actual
+    value (or a strong one if the actual value doesn't support weak
+    references), so identity of cached objects can't be reused by other
+    objects. An entry is removed when its actual value is garbage collected.
+
+    Cache doesn't know about changes of actual values. Use different
+    ``version`` tokens to compare a mutated value or call ``clear()``.
+
+        >>> from cykooz.testing import Dict
+        >>> memo = ComparisonMemo(maxsize=2, stripes=1)
+        >>> response = {'id': 1, 'items': list(range(1000)), 'status': 'ok'}
+        >>> matcher = Dict(id=1, status='ok')
+        >>> expected = memo(matcher)
+        >>> expected
+        <Memoized: Dict({'id': 1, 'status': 'ok'})>
+        >>> response == expected
+        True
+        >>> response == expected
+        True
+        >>> memo
+        <ComparisonMemo: 1/2 entries, 1 hits, 1 misses>
+        >>> memo.hit_rate
+        0.5
+        >>> response['status'] = 'error'
+        >>> response == expected  # cached result
+        True
+        >>> response == memo(matcher, version=1)
+        False
+
+    The least recently used entries are evicted when the cache is full:
+
+        >>> memo.currsize
+        2
+        >>> response == memo(matcher, version=2)
+        False
+        >>> memo.currsize
+        2
+        >>> memo.clear()
+        >>> memo
+        <ComparisonMemo: 0/2 entries, 0 hits, 0 misses>
+
+    An instance of this class is safe for concurrent use from many threads.
+    Entries are split into ``stripes`` segments by key, each segment
+    has its own lock and LRU order, so threads comparing different values
+    rarely wait for each other. The least recently used entry is evicted
+    from a segment when the segment holds ``maxsize // stripes`` entries.
+    """
+
+    def __init__(self, maxsize: int = 1024, stripes: int = 16):
+        self.maxsize = maxsize
+        stripes = max(1, min(stripes, maxsize))
+        self._stripes = tuple(_Stripe(maxsize // stripes) for _ in range(stripes))
+
+    def __call__(self, expected, version=None) -> 'Memoized':
+        return Memoized(self, expected, version)
+
+    wrap = __call__
+
+    @property
+    def currsize(self) -> int:
+        size = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.purge()
+                size += len(stripe.entries)
+        return size
+
+    @property
+    def hits(self) -> int:
+        return sum(stripe.hits for stripe in self._stripes)
+
+    @property
+    def misses(self) -> int:
+        return sum(stripe.misses for stripe in self._stripes)
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.hits
+        total = hits + self.misses
+        return hits / total if total else 0.0
+
+    def compare(self, expected, actual, version=None) -> bool:
+        """Returns result of ``expected == actual`` from the cache or
+        compares values and stores the result into the cache."""
+        key = (id(expected), id(actual), version)
+        stripe = self._stripes[hash(key) % len(self._stripes)]
+        entries = stripe.entries
+        with stripe.lock:
+            stripe.purge()
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+                stripe.hits += 1
+                return entry[0]
+            stripe.misses += 1
+
+        result = expected == actual
+
+        try:
+            actual_ref = weakref.ref(actual, partial(stripe.discard, key))
+        except TypeError:
+            actual_ref = actual
+        with stripe.lock:
+            stripe.purge()
+            entries[key] = (result, expected, actual_ref)
+            entries.move_to_end(key)
+            while len(entries) > stripe.maxsize:
+                entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.entries.clear()
+                stripe.pending.clear()
+                stripe.hits = 0
+                stripe.misses = 0
+
+    def __repr__(self):
+        return '<ComparisonMemo: %d/%d entries, %d hits, %d misses>' % (
+            self.currsize,
+            self.maxsize,
+            self.hits,
+            self.misses,
+        )
+
+
+class _Stripe:
+    """One independently locked segment of ``ComparisonMemo``."""
+
+    __slots__ = ('maxsize', 'entries', 'pending', 'lock', 'hits', 'misses')
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.pending = []
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def discard(self, key, _ref=None):
+        # Called by garbage collector at any time, even while the lock
+        # is held by the current thread, so the key is only marked
+        # for removal, like WeakValueDictionary does.
+        self.pending.append(key)
+
+    def purge(self):
+        """Removes entries of collected actual values. Must be called
+        under the lock before any access to entries."""
+        pending = self.pending
+        while pending:
+            self.entries.pop(pending.pop(), None)
+
+
+class Memoized:
+    """Wrapper of an expected value (matcher) that gets results
+    of comparisons from ``ComparisonMemo``."""
+
+    __slots__ = ('memo', 'expected', 'version')
+
+    def __init__(self, memo: ComparisonMemo, expected, version=None):
+        self.memo = memo
+        self.expected = expected
+        self.version = version
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        return self.memo.compare(self.expected, other, self.version)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '<Memoized: %r>' % (self.expected,)
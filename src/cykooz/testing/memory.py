@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+:Authors: cykooz
+:Date: 19.10.2026
+"""
+
+import re
+import tracemalloc
+
+
+__all__ = (
+    'MemoryBudget',
+    'Allocations',
+)
+
+
+class MemoryBudget:
+    """Context manager that checks memory usage by code inside it
+    with help of ``tracemalloc``.
+
+    Argument ``peak`` limits the peak size of memory allocated inside
+    the context (bytes or a string with units - ``KB``, ``MB``, ``GB``,
+    ``KiB``, ``MiB``, ``GiB``). Argument ``blocks`` limits the number
+    of memory blocks that have been allocated inside the context and
+    are still allocated at its exit.
+
+    If a limit is exceeded, ``AssertionError`` is raised with a list
+    of top source lines that allocated memory.
+
+        >>> with MemoryBudget(peak='1MB', blocks=100) as budget:
+        ...     data = [bytearray(1000) for _ in range(10)]
+        >>> budget.peak_size > 10000
+        True
+        >>> with MemoryBudget(peak='1MB', blocks=100):
+        ...     data = [bytearray(1000) for _ in range(1000)]
+        Traceback (most recent call last):
+        ...
+        AssertionError: Memory budget is exceeded: peak size ...MB > 1MB, ... > 100
+        Top allocating lines:
+          <doctest ...>:2: size=1...KiB (+1...KiB), count=1... (+1...), average=...
+
+    Tracing of memory allocations is started only inside the context
+    (if it was not started before), so code outside of it runs
+    without overhead. Use ``enabled=False`` to skip any checks.
+
+        >>> with MemoryBudget(peak=1, enabled=False) as budget:
+        ...     data = bytearray(1000)
+        >>> print(budget.peak_size)
+        None
+
+    Budgets may be nested, the peak of an outer budget includes memory
+    allocated before entering into an inner budget. Any other code
+    that reads the peak of traced memory with help of ``tracemalloc``
+    loses it, because the peak is reset on entering into a budget.
+
+        >>> with MemoryBudget(peak='1MB') as outer:
+        ...     data = bytearray(5000000)
+        ...     del data
+        ...     with MemoryBudget(peak='1MB') as inner:
+        ...         data = bytearray(1000)
+        Traceback (most recent call last):
+        ...
+        AssertionError: Memory budget is exceeded: peak size 5...MB > 1MB
+        >>> inner.peak_size < 100000
+        True
+    """
+
+    def __init__(self, peak=None, blocks: int | None = None, top=10, enabled=True):
+        self.peak = None if peak is None else parse_size(peak)
+        self.blocks = blocks
+        self.top = top
+        self.enabled = enabled
+        self.peak_size: int | None = None
+        self.allocated_blocks: int | None = None
+        self.allocated_size: int | None = None
+        self.top_stats: list[tracemalloc.StatisticDiff] = []
+        self._started = False
+        self._start_size = 0
+        self._start_snapshot = None
+        self._saved_peak = 0
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._start_size = tracemalloc.get_traced_memory()[0]
+        _reset_peak()
+        self._saved_peak = 0
+        _active_budgets.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if not self.enabled:
+            return
+        try:
+            peak = max(tracemalloc.get_traced_memory()[1], self._saved_peak)
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            _active_budgets.remove(self)
+            if self._started:
+                tracemalloc.stop()
+        start_snapshot = _filter_snapshot(self._start_snapshot)
+        snapshot = _filter_snapshot(snapshot)
+        self._start_snapshot = None
+
+        stats = snapshot.compare_to(start_snapshot, 'lineno')
+        stats = [s for s in stats if s.size_diff > 0]
+        self.peak_size = max(peak - self._start_size, 0)
+        self.allocated_blocks = sum(max(s.count_diff, 0) for s in stats)
+        self.allocated_size = sum(s.size_diff for s in stats)
+        self.top_stats = stats[: self.top]
+
+        if exc_type is None:
+            errors = self.errors()
+            if errors:
+                raise AssertionError(self._message(errors))
+
+    def errors(self) -> list[str]:
+        """Returns descriptions of exceeded limits."""
+        errors = []
+        if self.peak is not None and self.peak_size > self.peak:
+            errors.append(
+                'peak size %s > %s'
+                % (format_size(self.peak_size), format_size(self.peak))
+            )
+        if self.blocks is not None and self.allocated_blocks > self.blocks:
+            errors.append('%d blocks > %d' % (self.allocated_blocks, self.blocks))
+        return errors
+
+    def _message(self, errors: list[str]) -> str:
+        lines = ['Memory budget is exceeded: %s' % ', '.join(errors)]
+        if self.top_stats:
+            lines.append('Top allocating lines:')
+            lines.extend('  %s' % stat for stat in self.top_stats)
+        return '\n'.join(lines)
+
+
+class Allocations:
+    """An instance of this class is equal to a function (any callable
+    without arguments) if the number of retained memory blocks, that have
+    been allocated by ``loops`` calls of this function and are still
+    allocated after them, is not greater than ``blocks``.
+
+    Temporary memory that is freed before the end of a call is not
+    retained. Argument ``peak`` limits the peak size of memory allocated
+    by one call (bytes or a string with units, as in ``MemoryBudget``),
+    so it catches temporary allocations in a hot loop.
+
+    The function is called ``warmup`` times before measuring to fill
+    caches and lazy initialized values.
+
+        >>> def parse(data=b'{"id": 1}'):
+        ...     return data.decode()
+        >>> parse == Allocations(blocks=0)
+        True
+        >>> cache = []
+        >>> def leak():
+        ...     cache.append(bytearray(100))
+        >>> expected = Allocations(blocks=10, loops=100)
+        >>> leak == expected
+        False
+        >>> expected
+        <Allocations: blocks <= 10, measured ... blocks (...KB) after 100 calls,
+         peak per call ...B;
+         top: <doctest ...>:2: size=...KiB (+...KiB), count=... (+...), average=...>
+        >>> 1 == expected
+        False
+        >>> def temporary():
+        ...     return len(bytearray(1000000))
+        >>> temporary == Allocations(blocks=0)
+        True
+        >>> expected = Allocations(blocks=0, peak='100KB', loops=10)
+        >>> temporary == expected
+        False
+        >>> expected
+        <Allocations: blocks <= 0, peak per call <= 100KB,
+         measured 0 blocks (0B) after 10 calls, peak per call 1MB>
+    """
+
+    def __init__(
+        self,
+        blocks: int = 0,
+        peak=None,
+        loops: int = 100,
+        warmup: int = 1,
+        top=3,
+    ):
+        self.blocks = blocks
+        self.peak = None if peak is None else parse_size(peak)
+        self.loops = loops
+        self.warmup = warmup
+        self.top = top
+        self.budget: MemoryBudget | None = None
+        self.call_peak: int | None = None
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        if not callable(other):
+            return False
+        for _ in range(self.warmup):
+            other()
+        iterations = range(self.loops)
+        budget = MemoryBudget(top=self.top)
+        call_peak = 0
+        with budget:
+            for _ in iterations:
+                start_size = tracemalloc.get_traced_memory()[0]
+                _reset_peak()
+                other()
+                call_peak = max(
+                    call_peak, tracemalloc.get_traced_memory()[1] - start_size
+                )
+        self.budget = budget
+        self.call_peak = call_peak
+        if budget.allocated_blocks > self.blocks:
+            return False
+        return self.peak is None or call_peak <= self.peak
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        result = 'blocks <= %d' % self.blocks
+        if self.peak is not None:
+            result += ', peak per call <= %s' % format_size(self.peak)
+        budget = self.budget
+        if budget is not None:
+            result += ', measured %d blocks (%s) after %d calls, peak per call %s' % (
+                budget.allocated_blocks,
+                format_size(budget.allocated_size),
+                self.loops,
+                format_size(self.call_peak),
+            )
+            if budget.top_stats:
+                result += '; top: %s' % '; '.join(map(str, budget.top_stats))
+        return '<Allocations: %s>' % result
+
+
+# Budgets which contexts are entered and not exited yet
+_active_budgets: list[MemoryBudget] = []
+
+
+def _reset_peak():
+    """Resets the peak of traced memory, but keeps it for active budgets."""
+    peak = tracemalloc.get_traced_memory()[1]
+    for budget in _active_budgets:
+        budget._saved_peak = max(budget._saved_peak, peak)
+    tracemalloc.reset_peak()
+
+
+_SIZE_RE = re.compile(
+    r'^\s*(\d+(?:\.\d*)?|\.\d+)\s*([KMG]i?B|B)?\s*$',
+    re.IGNORECASE,
+)
+_SIZE_UNITS = {
+    'b': 1,
+    'kb': 1000,
+    'mb': 1000**2,
+    'gb': 1000**3,
+    'kib': 1024,
+    'mib': 1024**2,
+    'gib': 1024**3,
+}
+
+
+def parse_size(value: int | str) -> int:
+    """Returns size in bytes.
+
+    >>> parse_size('50MB'), parse_size('1.5 KiB'), parse_size(100)
+    (50000000, 1536, 100)
+    >>> parse_size('many')
+    Traceback (most recent call last):
+    ...
+    ValueError: Invalid size: 'many'
+    """
+    if isinstance(value, int):
+        return value
+    m = _SIZE_RE.match(value)
+    if not m:
+        raise ValueError('Invalid size: %r' % value)
+    unit = (m.group(2) or 'b').lower()
+    return int(float(m.group(1)) * _SIZE_UNITS[unit])
+
+
+def format_size(value: int) -> str:
+    """Returns human-readable representation of size in bytes.
+
+    >>> format_size(50000000), format_size(1536), format_size(100)
+    ('50MB', '1.54KB', '100B')
+    """
+    for unit, scale in (('GB', 1000**3), ('MB', 1000**2), ('KB', 1000)):
+        if value >= scale:
+            return '%.3g%s' % (value / scale, unit)
+    return '%dB' % value
+
+
+def _filter_snapshot(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    return snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+    )
@@ -4,15 +4,355 @@
 :Date: 13.05.2019
 """
 
+import ast
+import collections
+import configparser
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shlex
+
+
+FULL_RUN_OPTION = '--full'
+CACHE_FILE_NAME = os.path.join('.pytest_cache', 'cykooz-testing-runtests.json')
+CACHE_VERSION = 1
+
 
 def runtests():
     import sys
     import pytest
     from os import environ
     from os.path import dirname, join
+
     cfg_path = join(dirname(dirname(dirname(__file__))), 'setup.cfg')
 
     args = sys.argv[1:]
+    full_run = FULL_RUN_OPTION in args
+    args = [arg for arg in args if arg != FULL_RUN_OPTION]
+    plugins = []
+    if not full_run and not _has_paths(args):
+        selection = IncrementalSelection(cfg_path)
+        paths = selection.affected_paths()
+        if not paths:
+            print(
+                'No tests are affected by changed files. '
+                'Use %s to run all tests.' % FULL_RUN_OPTION
+            )
+            return
+        print(
+            'Run %d of %d test files affected by changed files. '
+            'Use %s to run all tests.'
+            % (len(paths), len(selection.test_files), FULL_RUN_OPTION)
+        )
+        args += paths
+        plugins.append(selection)
+
     args = ['-c', cfg_path] + args
     environ['IS_TESTING'] = 'True'
-    pytest.main(args)
+    pytest.main(args, plugins=plugins)
+
+
+class IncrementalSelection:
+    """Selects test files affected by changes of files since
+    the last successful run.
+
+    For each test file (test modules, modules with doctests and text files
+    with doctests) the cache stores content hashes of the file and
+    of all local modules imported by it directly or indirectly.
+    A test file is affected if it is absent in the cache or any of these
+    hashes is changed. Changing of the config file or any ``conftest.py``
+    affects all test files.
+
+    An instance of this class is also a pytest plugin that updates
+    the cache after run of selected tests. Files with failed tests
+    are removed from the cache, so they will be run again next time.
+    Files which tests are not all run (deselected by options like ``-k``
+    and ``-m`` or skipped because of ``-x``) are not stored into the cache.
+    """
+
+    def __init__(self, cfg_path: str):
+        self.cfg_path = os.path.abspath(cfg_path)
+        self.root_dir = os.path.dirname(self.cfg_path)
+        self.cache_path = os.path.join(self.root_dir, CACHE_FILE_NAME)
+        self._hashes = {}
+        self._imports = {}
+        self._selected = []
+        self._failed = set()
+        self._reported = set()
+        self._deselected = set()
+        self._collected_items = collections.Counter()
+        self._run_items = collections.Counter()
+
+        ini = configparser.ConfigParser(interpolation=None)
+        ini.read(self.cfg_path)
+        section = ini['tool:pytest'] if ini.has_section('tool:pytest') else {}
+        self.test_paths = [
+            path
+            for path in (
+                os.path.join(self.root_dir, p)
+                for p in section.get('testpaths', '').split()
+            )
+            if os.path.exists(path)
+        ] or [os.getcwd()]
+        self.python_files = section.get('python_files', 'test_*.py *_test.py').split()
+        addopts = shlex.split(section.get('addopts', ''), comments=True)
+        self.doctest_modules = '--doctest-modules' in addopts
+        self.doctest_globs = _option_values(addopts, '--doctest-glob') or ['test*.txt']
+
+        self.modules = {}
+        self.conftest_files = []
+        self.test_files = []
+        for path in self._iter_files():
+            name = os.path.basename(path)
+            if name.endswith('.py'):
+                self.modules.setdefault(_module_name(path), path)
+                if name == 'conftest.py':
+                    self.conftest_files.append(path)
+            if self._is_test_file(name):
+                self.test_files.append(path)
+
+    def affected_paths(self) -> list[str]:
+        """Returns paths of test files affected by changes."""
+        cache = self._load_cache()
+        affected = []
+        for path in self.test_files:
+            entry = cache.get(self._rel_path(path))
+            if entry is None or entry != self._dep_hashes(path):
+                affected.append(path)
+        self._selected = affected
+        return affected
+
+    # pytest hooks
+
+    def pytest_collectreport(self, report):
+        self._add_report(report)
+
+    def pytest_deselected(self, items):
+        self._deselected.update(_node_path(item.nodeid) for item in items)
+
+    def pytest_collection_finish(self, session):
+        self._collected_items.update(_node_path(item.nodeid) for item in session.items)
+
+    def pytest_runtest_logreport(self, report):
+        self._add_report(report)
+        if report.when == 'teardown':
+            self._run_items[_node_path(report.nodeid)] += 1
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if exitstatus not in (0, 1):
+            # Run is interrupted or failed because of internal error
+            return
+        root_path = str(session.config.rootpath)
+        passed = {
+            os.path.join(root_path, p)
+            for p in self._reported
+            if p not in self._failed
+            and p not in self._deselected
+            and self._run_items[p] == self._collected_items[p]
+        }
+        cache = self._load_cache()
+        for path in self._selected:
+            key = self._rel_path(path)
+            if path in passed:
+                cache[key] = self._dep_hashes(path)
+            else:
+                cache.pop(key, None)
+        self._save_cache(cache)
+
+    def _add_report(self, report):
+        path = _node_path(report.nodeid)
+        if report.failed:
+            self._failed.add(path)
+        self._reported.add(path)
+
+    # Internal helpers
+
+    def _iter_files(self):
+        seen = set()
+        for test_path in self.test_paths:
+            if os.path.isfile(test_path):
+                yield os.path.abspath(test_path)
+                continue
+            for dir_path, dir_names, file_names in os.walk(test_path):
+                dir_names[:] = sorted(
+                    d
+                    for d in dir_names
+                    if not any(fnmatch.fnmatch(d, p) for p in _NORECURSE_DIRS)
+                )
+                for file_name in sorted(file_names):
+                    path = os.path.abspath(os.path.join(dir_path, file_name))
+                    if path not in seen:
+                        seen.add(path)
+                        yield path
+
+    def _is_test_file(self, name: str) -> bool:
+        if name.endswith('.py'):
+            if self.doctest_modules and name != 'setup.py':
+                return True
+            return any(fnmatch.fnmatch(name, p) for p in self.python_files)
+        return any(fnmatch.fnmatch(name, p) for p in self.doctest_globs)
+
+    def _dep_hashes(self, path: str) -> dict:
+        """Returns hashes of the given file, all files imported by it
+        directly or indirectly, ``conftest.py`` files and the config file."""
+        deps = {self.cfg_path, path}
+        deps.update(self.conftest_files)
+        stack = [path]
+        while stack:
+            for dep in self._imported_files(stack.pop()):
+                if dep not in deps:
+                    deps.add(dep)
+                    stack.append(dep)
+        return {self._rel_path(p): self._file_hash(p) for p in sorted(deps)}
+
+    def _imported_files(self, path: str) -> set:
+        files = self._imports.get(path)
+        if files is not None:
+            return files
+        files = set()
+        for name in _imported_modules(path):
+            # Importing of a module executes "__init__.py" of all its parents
+            parts = name.split('.')
+            for i in range(1, len(parts) + 1):
+                module_path = self.modules.get('.'.join(parts[:i]))
+                if module_path is not None:
+                    files.add(module_path)
+        self._imports[path] = files
+        return files
+
+    def _file_hash(self, path: str) -> str:
+        file_hash = self._hashes.get(path)
+        if file_hash is None:
+            try:
+                with open(path, 'rb') as f:
+                    file_hash = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                file_hash = ''
+            self._hashes[path] = file_hash
+        return file_hash
+
+    def _rel_path(self, path: str) -> str:
+        return os.path.relpath(path, self.root_dir)
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, 'rt') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != CACHE_VERSION:
+            return {}
+        return data.get('files', {})
+
+    def _save_cache(self, files: dict):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path, 'wt') as f:
+            json.dump({'version': CACHE_VERSION, 'files': files}, f, indent=1)
+
+
+# The same as default value of "norecursedirs" option of pytest
+_NORECURSE_DIRS = (
+    '*.egg',
+    '.*',
+    '_darcs',
+    'build',
+    'CVS',
+    'dist',
+    'node_modules',
+    'venv',
+    '{arch}',
+    '__pycache__',
+)
+# Groups must not capture line breaks, otherwise an import that directly
+# follows another import is consumed by the previous match.
+_DOCTEST_IMPORT_RE = re.compile(
+    r'^[ \t]*(?:>>>|\.\.\.)[ \t]+'
+    r'(?:from[ \t]+([\w.]+)[ \t]+import[ \t]+([\w \t,()]+)|import[ \t]+([\w., \t]+))',
+    re.MULTILINE,
+)
+
+
+def _imported_modules(path: str) -> set:
+    """Returns names of modules imported by the given file, including
+    imports in doctests of a Python module and parent packages of
+    the module itself. Names imported by "from package import name"
+    are returned as "package.name" too, because they may be submodules."""
+    try:
+        with open(path, 'rt', encoding='utf-8') as f:
+            source = f.read()
+    except (OSError, UnicodeDecodeError):
+        return set()
+
+    names = set()
+    if path.endswith('.py'):
+        try:
+            tree = ast.parse(source, path)
+        except SyntaxError:
+            return names
+        package = _module_name(path)
+        if not os.path.basename(path) == '__init__.py':
+            package = package.rpartition('.')[0]
+        if package:
+            # Importing of the module executes "__init__.py" of its package
+            names.add(package)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                module = node.module or ''
+                if node.level:
+                    base = package.split('.')
+                    base = base[: len(base) - node.level + 1]
+                    module = '.'.join(p for p in base + [module] if p)
+                names.add(module)
+                names.update('%s.%s' % (module, alias.name) for alias in node.names)
+
+    # Doctests of a text file or of docstrings of a Python module
+    for from_module, from_names, modules in _DOCTEST_IMPORT_RE.findall(source):
+        if from_module:
+            names.add(from_module)
+            for name in from_names.replace('(', ' ').replace(')', ' ').split(','):
+                name = name.split()
+                if name:
+                    names.add('%s.%s' % (from_module, name[0]))
+        else:
+            names.update(n.split()[0] for n in modules.split(',') if n.strip())
+    return names
+
+
+def _module_name(path: str) -> str:
+    """Returns the full name of a module with the given path."""
+    dir_path, file_name = os.path.split(path)
+    parts = []
+    if file_name != '__init__.py':
+        parts.append(os.path.splitext(file_name)[0])
+    while os.path.isfile(os.path.join(dir_path, '__init__.py')):
+        dir_path, name = os.path.split(dir_path)
+        parts.append(name)
+    return '.'.join(reversed(parts))
+
+
+def _option_values(args: list[str], option: str) -> list[str]:
+    values = []
+    prefix = option + '='
+    for i, arg in enumerate(args):
+        if arg.startswith(prefix):
+            values.append(arg[len(prefix) :])
+        elif arg == option and i + 1 < len(args):
+            values.append(args[i + 1])
+    return values
+
+
+def _node_path(nodeid: str) -> str:
+    """Returns path of a file relative to the root directory
+    from ID of a pytest node."""
+    return os.path.normpath(nodeid.split('::')[0])
+
+
+def _has_paths(args: list[str]) -> bool:
+    """Returns True if arguments of command line contain paths to tests."""
+    return any(
+        not arg.startswith('-') and os.path.exists(arg.split('::')[0]) for arg in args
+    )
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+:Authors: cykooz
+:Date: 19.10.2026
+"""
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+:Authors: cykooz
+:Date: 19.10.2026
+"""
+
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from cykooz.testing import MatcherIndex, RoundFloat
+
+
+def test_numpy_scalars():
+    np = pytest.importorskip('numpy')
+    v = RoundFloat(1.23456789, 3)
+    assert v == np.float64(1.2347)
+    assert v == np.float32(1.2347)
+    assert v != np.float64(1.2341)
+    assert RoundFloat(np.float64(1.2347), 3) == v
+    assert RoundFloat(np.int64(1250), -2) == np.int64(1250)
+    assert RoundFloat(np.int64(1250), -2) != np.int64(1350)
+    assert RoundFloat(np.float64(0.1), 20) == 0.1
+    assert v in MatcherIndex([np.float64(2.0), np.float64(1.2347)])
+    assert v not in MatcherIndex([np.float64(1.2341)])
+
+
+def test_equal_instances_of_different_types():
+    values = [1.235, Decimal('1.235'), Decimal('1.2350'), Fraction(247, 200)]
+    matchers = [RoundFloat(value, 3) for value in values]
+    for matcher in matchers:
+        assert matcher == matchers[0]
+        assert hash(matcher) == hash(matchers[0])
+    assert len(set(matchers)) == 1
+    assert RoundFloat(0.1, 20) != RoundFloat(Decimal('0.1'), 20)
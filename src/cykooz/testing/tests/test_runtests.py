@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+:Authors: cykooz
+:Date: 19.10.2026
+"""
+
+import pytest
+
+from cykooz.testing.runtests import IncrementalSelection
+
+
+pytest_plugins = ['pytester']
+
+
+@pytest.fixture
+def project(pytester):
+    pytester.makefile(
+        '.cfg',
+        setup=(
+            '[tool:pytest]\n'
+            "addopts = --doctest-modules --doctest-glob='*.rst'\n"
+            'python_files = test_*.py\n'
+        ),
+    )
+    pkg = pytester.mkpydir('pkg')
+    (pkg / '__init__.py').write_text('VALUE = 1\n')
+    (pkg / 'helpers.py').write_text('HELPER = 2\n')
+    (pkg / 'mod.py').write_text(
+        '"""\n>>> from pkg import VALUE\n>>> VALUE\n1\n"""\n',
+    )
+    pytester.makefile(
+        '.rst',
+        README=(
+            'Example\n'
+            '=======\n'
+            '\n'
+            '    >>> import pkg\n'
+            '    >>> from pkg.helpers import HELPER\n'
+            '    >>> HELPER\n'
+            '    2\n'
+        ),
+    )
+    pytester.makepyfile(
+        test_feature='def test_foo():\n    pass\n\n\ndef test_bar():\n    pass\n',
+    )
+    return pytester
+
+
+def run(pytester, *args):
+    """Runs tests affected by changes like ``runtests`` does and returns
+    relative paths of the selected files."""
+    selection = IncrementalSelection(str(pytester.path / 'setup.cfg'))
+    paths = selection.affected_paths()
+    if paths:
+        pytester.runpytest_inprocess(
+            '-c', 'setup.cfg', *args, *paths, plugins=[selection]
+        )
+    return sorted(selection._rel_path(p) for p in paths)
+
+
+def dependencies(pytester, path: str) -> list:
+    selection = IncrementalSelection(str(pytester.path / 'setup.cfg'))
+    deps = selection._dep_hashes(str(pytester.path / path))
+    return sorted(deps)
+
+
+ALL_FILES = [
+    'README.rst',
+    'pkg/__init__.py',
+    'pkg/helpers.py',
+    'pkg/mod.py',
+    'test_feature.py',
+]
+
+
+def test_module_depends_on_doctest_imports_and_own_package(project):
+    assert dependencies(project, 'pkg/mod.py') == [
+        'pkg/__init__.py',
+        'pkg/mod.py',
+        'setup.cfg',
+    ]
+    assert dependencies(project, 'pkg/helpers.py') == [
+        'pkg/__init__.py',
+        'pkg/helpers.py',
+        'setup.cfg',
+    ]
+
+
+def test_text_file_depends_on_consecutive_imports(project):
+    assert dependencies(project, 'README.rst') == [
+        'README.rst',
+        'pkg/__init__.py',
+        'pkg/helpers.py',
+        'setup.cfg',
+    ]
+
+
+def test_only_affected_files_are_run(project):
+    assert run(project) == ALL_FILES
+    assert run(project) == []
+
+    (project.path / 'pkg' / 'helpers.py').write_text('HELPER = 2  # changed\n')
+    assert run(project) == ['README.rst', 'pkg/helpers.py']
+
+    (project.path / 'pkg' / '__init__.py').write_text('VALUE = 1  # changed\n')
+    assert run(project) == [
+        'README.rst',
+        'pkg/__init__.py',
+        'pkg/helpers.py',
+        'pkg/mod.py',
+    ]
+
+    (project.path / 'setup.cfg').write_text(
+        (project.path / 'setup.cfg').read_text() + '# changed\n'
+    )
+    assert run(project) == ALL_FILES
+
+
+def test_failed_files_are_run_again(project):
+    project.makepyfile(test_feature='def test_foo():\n    assert False\n')
+    assert run(project) == ALL_FILES
+    assert run(project) == ['test_feature.py']
+
+
+@pytest.mark.parametrize(
+    'args',
+    [
+        ('-k', 'foo'),
+        ('-m', 'slow'),
+        ('--deselect', 'test_feature.py::test_bar'),
+        ('-x',),
+    ],
+)
+def test_partially_run_files_are_not_cached(project, args):
+    if args == ('-x',):
+        # Tests after the first failure are not run
+        project.makepyfile(test_a='def test_fail():\n    assert False\n')
+    assert 'test_feature.py' in run(project, *args)
+    assert 'test_feature.py' in run(project)
+    assert 'test_feature.py' not in run(project)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+:Authors: cykooz
+:Date: 19.10.2026
+"""
+
+import threading
+from dataclasses import dataclass
+
+from cykooz.testing import (
+    ANY,
+    Attrs,
+    CiStr,
+    ComparisonMemo,
+    Dict,
+    DictCi,
+    Json,
+    JsonLines,
+    List,
+    MatcherIndex,
+    RegExpString,
+    RoundFloat,
+    Url,
+)
+
+
+@dataclass
+class User:
+    name: str
+    age: int
+
+
+VALUE = {
+    'created': '2020-04-14T12:34:00.002000+00:00',
+    'items': [{'key': 'a', 'value': 1}, {'key': 'b', 'value': 2.0004}],
+    'source': 'https://domain.com/item?p=0&t=total',
+    'response': '{"status": 200, "body": "OK"}',
+    'headers': {'Content-Type': 'text/plain'},
+    'user': User('Bob', 42),
+    'log': '{"id": 1}\n{"id": 2}\n',
+}
+EXPECTED = Dict(
+    {
+        'created': RegExpString('^2020-04.*'),
+        'items': List([Dict(key='a'), Dict(value=RoundFloat(2.0, 3))]),
+        'source': Url('https://domain.com/item?t=total&p=0'),
+        'response': Json({'status': 200, 'body': ANY}),
+        'headers': DictCi({'content-type': CiStr('TEXT/PLAIN')}),
+        'user': Attrs(name='Bob'),
+        'log': JsonLines([{'id': 1}, {'id': 2}]),
+    }
+)
+NOT_EXPECTED = Dict(EXPECTED, user=Attrs(name='Alice'))
+INDEX_VALUES = ['Header-%d' % i for i in range(1000)] + [i / 7 for i in range(1000)]
+
+
+def compare(i: int, index: MatcherIndex) -> bool:
+    """Returns True if all comparisons of shared matchers give
+    expected results."""
+    return (
+        VALUE == EXPECTED
+        and VALUE != NOT_EXPECTED
+        and CiStr('header-%d' % (i % 1000)) in index
+        and RoundFloat((i % 1000) / 7, 5) in index
+        and CiStr('header') not in index
+    )
+
+
+def run_threads(target, num_threads: int = 8) -> list:
+    """Runs given function in many threads at the same time
+    and returns a list of results of all calls."""
+    barrier = threading.Barrier(num_threads)
+    results = [None] * num_threads
+
+    def worker(n):
+        barrier.wait()
+        results[n] = target(n)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_shared_matchers():
+    # A fresh index, so its buckets are built concurrently
+    index = MatcherIndex(INDEX_VALUES)
+
+    def target(n):
+        return [i for i in range(n, n + 300) if not compare(i, index)]
+
+    assert run_threads(target) == [[]] * 8
+
+
+def test_shared_comparison_memo():
+    memo = ComparisonMemo(maxsize=64)
+    values = [dict(VALUE, id=i) for i in range(100)]
+
+    def target(n):
+        errors = []
+        for i in range(500):
+            value = values[(n + i) % len(values)]
+            if value != memo(EXPECTED) or value == memo(NOT_EXPECTED):
+                errors.append(i)
+        return errors
+
+    assert run_threads(target) == [[]] * 8
+    assert memo.currsize <= 64
+    assert memo.hits + memo.misses == 8 * 500 * 2
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+:Authors: cykooz
+:Date: 19.10.2026
+"""
+
+import json
+import math
+import os
+import re
+import time
+from statistics import median
+from typing import Callable
+
+
+__all__ = (
+    'TimingStats',
+    'measure',
+    'Faster',
+)
+
+
+class TimingStats:
+    """Robust statistics of execution time of one call of a function.
+
+    >>> stats = TimingStats([0.003, 0.001, 0.002, 0.010, 0.002], loops=100)
+    >>> stats.median
+    0.002
+    >>> stats.mad
+    0.001
+    >>> stats.percentile(50)
+    0.002
+    >>> round(stats.percentile(95), 6)
+    0.0086
+    >>> stats
+    <TimingStats: median 2ms, MAD 1ms, min 1ms, max 10ms, 5 runs x 100 loops>
+    """
+
+    __slots__ = ('samples', 'loops', 'median', 'mad')
+
+    def __init__(self, samples, loops: int = 1):
+        self.samples = sorted(samples)
+        self.loops = loops
+        self.median = median(self.samples)
+        self.mad = median(abs(x - self.median) for x in self.samples)
+
+    @property
+    def min(self) -> float:
+        return self.samples[0]
+
+    @property
+    def max(self) -> float:
+        return self.samples[-1]
+
+    def percentile(self, p: float) -> float:
+        """Returns given percentile of samples with linear interpolation
+        between closest ranks."""
+        samples = self.samples
+        k = (len(samples) - 1) * p / 100
+        f = math.floor(k)
+        c = math.ceil(k)
+        if f == c:
+            return samples[f]
+        return samples[f] + (samples[c] - samples[f]) * (k - f)
+
+    def __repr__(self):
+        return (
+            '<TimingStats: median %s, MAD %s, min %s, max %s, %d runs x %d loops>'
+            % (
+                format_duration(self.median),
+                format_duration(self.mad),
+                format_duration(self.min),
+                format_duration(self.max),
+                len(self.samples),
+                self.loops,
+            )
+        )
+
+
+def measure(
+    func: Callable[[], object],
+    repeat: int = 7,
+    warmup: int = 1,
+    min_time: float = 0.02,
+    timer: Callable[[], float] = time.perf_counter,
+) -> TimingStats:
+    """Measures execution time of one call of given function.
+
+    The number of calls in one run (loops) is calibrated so that the run
+    takes at least ``min_time`` seconds. After ``warmup`` runs, which
+    results are ignored, the function is run ``repeat`` times.
+
+    >>> stats = measure(lambda: None, repeat=3, min_time=0.001)
+    >>> len(stats.samples)
+    3
+    >>> stats.loops > 1
+    True
+    """
+    loops = _calibrate(func, min_time, timer)
+    for _ in range(warmup):
+        _run(func, loops, timer)
+    samples = [_run(func, loops, timer) / loops for _ in range(repeat)]
+    return TimingStats(samples, loops)
+
+
+class Faster:
+    """An instance of this class is equal to a function (any callable
+    without arguments) if given percentile of execution time of one call
+    of this function is not greater than the budget.
+
+    The budget is an absolute time given in argument ``than``
+    (seconds or a string with units - ``ns``, ``us``, ``ms``, ``s``)
+    or a time stored in a baseline file multiplied by ``tolerance``.
+
+        >>> fast = Faster(than='100ms', percentile=95)
+        >>> fast
+        <Faster: p95 <= 100ms>
+        >>> (lambda: sum(range(10))) == fast
+        True
+        >>> slow = Faster(than='1us', repeat=3, min_time=0.001)
+        >>> (lambda: time.sleep(0.001)) == slow
+        False
+        >>> slow
+        <Faster: p95 <= 1us, measured p95 ...ms (median ...ms, MAD ..., 3 runs x ...)>
+        >>> 1 == fast
+        False
+
+    The baseline file is a JSON-file with mapping of a key to the time
+    in seconds. If the file or the key is absent, measured time is
+    stored into the file and the comparison succeeds.
+
+        >>> import tempfile
+        >>> with tempfile.TemporaryDirectory() as tmp_dir:
+        ...     path = os.path.join(tmp_dir, 'baseline.json')
+        ...     fast = Faster(baseline=path, key='sum', tolerance=1.5, min_time=0.001)
+        ...     r1 = (lambda: sum(range(10))) == fast
+        ...     r2 = (lambda: sum(range(10000))) == fast
+        >>> r1, r2
+        (True, False)
+        >>> fast
+        <Faster: p95 <= 1.5 x baseline '.../baseline.json'['sum'], measured ...>
+
+    Attribute ``stats`` contains statistics of the last comparison.
+    """
+
+    def __init__(
+        self,
+        than: float | str | None = None,
+        percentile: float = 95,
+        baseline: str | os.PathLike | None = None,
+        key: str | None = None,
+        tolerance: float = 1.1,
+        repeat: int = 7,
+        warmup: int = 1,
+        min_time: float = 0.02,
+    ):
+        if (than is None) == (baseline is None):
+            raise ValueError('Exactly one of "than" and "baseline" is required')
+        if baseline is not None and key is None:
+            raise ValueError('Argument "key" is required to use baseline file')
+        self.than = None if than is None else parse_duration(than)
+        self.percentile = percentile
+        self.baseline = baseline
+        self.key = key
+        self.tolerance = tolerance
+        self.repeat = repeat
+        self.warmup = warmup
+        self.min_time = min_time
+        self.stats: TimingStats | None = None
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        if not callable(other):
+            return False
+        stats = measure(
+            other,
+            repeat=self.repeat,
+            warmup=self.warmup,
+            min_time=self.min_time,
+        )
+        self.stats = stats
+        actual = stats.percentile(self.percentile)
+        budget = self._budget()
+        if budget is None:
+            self._store_baseline(actual)
+            return True
+        return actual <= budget
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        if self.than is not None:
+            budget = format_duration(self.than)
+        else:
+            budget = '%s x baseline %r[%r]' % (
+                self.tolerance,
+                os.fspath(self.baseline),
+                self.key,
+            )
+        result = 'p%s <= %s' % (self.percentile, budget)
+        stats = self.stats
+        if stats is not None:
+            result += ', measured p%s %s (median %s, MAD %s, %d runs x %d loops)' % (
+                self.percentile,
+                format_duration(stats.percentile(self.percentile)),
+                format_duration(stats.median),
+                format_duration(stats.mad),
+                len(stats.samples),
+                stats.loops,
+            )
+        return '<Faster: %s>' % result
+
+    def _budget(self) -> float | None:
+        if self.than is not None:
+            return self.than
+        value = _read_baseline(self.baseline).get(self.key)
+        if value is None:
+            return None
+        return value * self.tolerance
+
+    def _store_baseline(self, value: float):
+        data = _read_baseline(self.baseline)
+        data[self.key] = value
+        with open(self.baseline, 'wt') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+
+_DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d*)?|\.\d+)\s*(ns|us|µs|ms|s)?\s*$')
+_DURATION_UNITS = {'ns': 1e-9, 'us': 1e-6, 'µs': 1e-6, 'ms': 1e-3, 's': 1, None: 1}
+
+
+def parse_duration(value: float | str) -> float:
+    """Returns duration in seconds.
+
+    >>> parse_duration('10ms'), parse_duration('1.5 s'), parse_duration(0.5)
+    (0.01, 1.5, 0.5)
+    >>> parse_duration('10 minutes')
+    Traceback (most recent call last):
+    ...
+    ValueError: Invalid duration: '10 minutes'
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _DURATION_RE.match(value)
+    if not m:
+        raise ValueError('Invalid duration: %r' % value)
+    return float(m.group(1)) * _DURATION_UNITS[m.group(2)]
+
+
+def format_duration(value: float) -> str:
+    """Returns human-readable representation of duration in seconds.
+
+    >>> format_duration(0.0123456), format_duration(2.5e-7), format_duration(3)
+    ('12.3ms', '250ns', '3s')
+    """
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if value >= scale:
+            return '%.3g%s' % (value / scale, unit)
+    return '%.3gns' % (value / 1e-9)
+
+
+def _run(func, loops: int, timer) -> float:
+    iterations = range(loops)
+    start = timer()
+    for _ in iterations:
+        func()
+    return timer() - start
+
+
+def _calibrate(func, min_time: float, timer) -> int:
+    """Returns the number of loops that takes at least ``min_time`` seconds,
+    like ``timeit.Timer.autorange()`` does."""
+    i = 1
+    while True:
+        for j in (1, 2, 5):
+            loops = i * j
+            if _run(func, loops, timer) >= min_time:
+                return loops
+        i *= 10
+
+
+def _read_baseline(path) -> dict:
+    try:
+        with open(path, 'rt') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}